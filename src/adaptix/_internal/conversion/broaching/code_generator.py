@@ -1,23 +1,24 @@
 import ast
-import itertools
+import cmath
 from abc import ABC, abstractmethod
-from ast import AST
-from collections import defaultdict
-from functools import update_wrapper
+from collections import OrderedDict, defaultdict
+from functools import lru_cache, update_wrapper
+from hashlib import blake2b
 from inspect import Signature
-from typing import Callable, DefaultDict, Mapping, Optional, Tuple, Union
+from threading import Lock
+from types import CodeType
+from typing import Any, Callable, DefaultDict, Dict, List, Mapping, Optional, Sequence, Tuple, Union, cast
 
-from ...code_tools.ast_templater import ast_substitute
 from ...code_tools.cascade_namespace import BuiltinCascadeNamespace, CascadeNamespace
-from ...code_tools.code_builder import CodeBuilder
 from ...code_tools.name_sanitizer import NameSanitizer
 from ...code_tools.utils import get_literal_expr, get_literal_from_factory
 from ...compat import compat_ast_unparse
+from ...feature_requirement import HAS_PY_39
 from ...model_tools.definitions import DescriptorAccessor, ItemAccessor
-from ...special_cases_optimization import as_is_stub
 from .definitions import (
     AccessorElement,
     ConstantElement,
+    FuncCallArg,
     FunctionElement,
     KeywordArg,
     ParameterElement,
@@ -26,6 +27,10 @@ from .definitions import (
     UnpackMapping,
 )
 
+# ast.unparse never distinguishes nor mutates expression context instances,
+# so one shared Load object can serve every generated node
+_LOAD = ast.Load()
+
 BroachingPlan = Union[
     ParameterElement,
     ConstantElement,
@@ -34,11 +39,157 @@ BroachingPlan = Union[
 ]
 
 
+def _update_sized(hasher, data: bytes) -> None:
+    # variable-size components are length-prefixed,
+    # so the byte stream of one plan can not be replayed by a differently shaped one
+    hasher.update(len(data).to_bytes(8, "little"))
+    hasher.update(data)
+
+
+def _hash_arg_kind(hasher, arg: "FuncCallArg[BroachingPlan]") -> None:
+    if isinstance(arg, PositionalArg):
+        hasher.update(b"pos;")
+    elif isinstance(arg, KeywordArg):
+        hasher.update(b"kw;")
+        _update_sized(hasher, arg.key.encode())
+    elif isinstance(arg, UnpackMapping):
+        hasher.update(b"unpack_mapping;")
+    elif isinstance(arg, UnpackIterable):
+        hasher.update(b"unpack_iterable;")
+    else:
+        raise TypeError
+
+
+def _plan_fingerprint(plan: BroachingPlan) -> str:
+    """Computes a structural hash of the plan.
+
+    Plan elements reference live objects (functions, constant values, accessor getters),
+    so the fingerprint involves their ids.
+    Every object whose id was hashed must be kept alive as long as the fingerprint is used,
+    otherwise the id can be reused by a newly created object.
+    """
+    hasher = blake2b(digest_size=16)
+    # pre-order traversal driven by an explicit stack,
+    # so arbitrarily nested plans can not hit the recursion limit
+    stack: List[BroachingPlan] = [plan]
+    while stack:
+        element = stack.pop()
+        if isinstance(element, ParameterElement):
+            hasher.update(b"param;")
+            _update_sized(hasher, element.name.encode())
+        elif isinstance(element, ConstantElement):
+            hasher.update(f"const:{id(element.value)};".encode())
+        elif isinstance(element, FunctionElement):
+            hasher.update(f"func:{id(element.func)}:{len(element.args)};".encode())
+            for arg in element.args:
+                _hash_arg_kind(hasher, arg)
+            stack.extend(arg.element for arg in reversed(element.args))
+        elif isinstance(element, AccessorElement):
+            accessor = element.accessor
+            if isinstance(accessor, DescriptorAccessor):
+                hasher.update(b"attr_accessor;")
+                _update_sized(hasher, accessor.attr_name.encode())
+            elif isinstance(accessor, ItemAccessor):
+                hasher.update(b"item_accessor;")
+                _update_sized(hasher, repr(accessor.key).encode())
+            else:
+                hasher.update(f"accessor:{id(accessor.getter)};".encode())
+            stack.append(element.target)
+        else:
+            raise TypeError
+    return hasher.hexdigest()
+
+
+_CodeCacheKey = Tuple[str, Signature, str, int]
+_CodeCacheValue = Tuple[str, CodeType, Mapping[str, object], BroachingPlan]
+# Entries pin plans and namespaces (user functions, constructors, signatures),
+# so the cache is bounded with LRU eviction to keep dynamically built converters collectable.
+# Eviction removes the entry together with its pinned plan,
+# so the id-stability invariant of _plan_fingerprint is preserved
+_CODE_CACHE_MAX_SIZE = 256
+_code_cache: "OrderedDict[_CodeCacheKey, _CodeCacheValue]" = OrderedDict()
+# converters can be built from several threads,
+# so every cache access (including LRU bookkeeping) happens under the lock
+_code_cache_lock = Lock()
+
+# Exact types whose values can be passed to ast.Constant directly,
+# skipping get_literal_expr() and re-parsing of its result.
+# Subclasses (e.g. IntEnum) must not be rendered as plain literals.
+_LITERAL_TYPES = frozenset({int, float, complex, bool, str, bytes, type(None)})
+
+
+def _parse_expr(expr: str) -> ast.expr:
+    return ast.parse(expr, mode="eval").body
+
+
+def _fill_missing_locations(return_stmt: ast.Return) -> None:
+    # iterative counterpart of ast.fix_missing_locations for the grafted return expression:
+    # ast.walk keeps an explicit queue, so deep plans do not spend Python stack here
+    lineno = return_stmt.lineno
+    col_offset = return_stmt.col_offset
+    end_lineno = return_stmt.end_lineno
+    end_col_offset = return_stmt.end_col_offset
+    for node in ast.walk(return_stmt):
+        if "lineno" in node._attributes:
+            attrs = node.__dict__
+            attrs.setdefault("lineno", lineno)
+            attrs.setdefault("col_offset", col_offset)
+            attrs.setdefault("end_lineno", end_lineno)
+            attrs.setdefault("end_col_offset", end_col_offset)
+
+
+def _do_strip_annotations(signature: Signature) -> Signature:
+    return signature.replace(
+        parameters=[param.replace(annotation=Signature.empty) for param in signature.parameters.values()],
+        return_annotation=Signature.empty,
+    )
+
+
+_strip_annotations_cached = lru_cache(maxsize=1024)(_do_strip_annotations)
+
+
+def _strip_annotations(signature: Signature) -> Signature:
+    # signatures of generated closures repeat a lot (e.g. ``(data: Any) -> Any``),
+    # but hashing one fails if some annotation is unhashable
+    try:
+        return _strip_annotations_cached(signature)
+    except TypeError:
+        return _do_strip_annotations(signature)
+
+
+if HAS_PY_39:
+    def _build_subscript(target_expr: ast.expr, key: Union[int, str]) -> ast.expr:
+        return ast.Subscript(value=target_expr, slice=ast.Constant(value=key), ctx=_LOAD)
+else:
+    def _build_subscript(target_expr: ast.expr, key: Union[int, str]) -> ast.expr:
+        return ast.Subscript(value=target_expr, slice=ast.Index(value=ast.Constant(value=key)), ctx=_LOAD)
+
+
 class GenState:
+    __slots__ = ("_namespace", "_name_sanitizer", "_prefix_counter", "_mangled_names", "_literal_exprs", "_next_suffix")
+
     def __init__(self, namespace: CascadeNamespace, name_sanitizer: NameSanitizer):
         self._namespace = namespace
         self._name_sanitizer = name_sanitizer
-        self._prefix_counter: DefaultDict[str, int] = defaultdict(lambda: 0)
+        self._prefix_counter: DefaultDict[str, int] = defaultdict(int)
+        self._mangled_names: Dict[Tuple[str, int], str] = {}
+        self._literal_exprs: Dict[Tuple[type, Any], Optional[str]] = {}
+        self._next_suffix: Dict[str, int] = {}
+
+    def literal_expr(self, value: object) -> Optional[str]:
+        # the type is included into the key to keep values
+        # that compare equal across types (1, True, 1.0) apart
+        memo_key = (type(value), value)
+        try:
+            return self._literal_exprs[memo_key]
+        except TypeError:
+            return get_literal_expr(value)
+        except KeyError:
+            pass
+
+        expr = get_literal_expr(value)
+        self._literal_exprs[memo_key] = expr
+        return expr
 
     def register_next_id(self, prefix: str, obj: object) -> str:
         number = self._prefix_counter[prefix]
@@ -47,15 +198,80 @@ class GenState:
         return self.register_mangled(name, obj)
 
     def register_mangled(self, base: str, obj: object) -> str:
+        # the memoized object is kept alive by the namespace, so its id can not be reused
+        memo_key = (base, id(obj))
+        try:
+            return self._mangled_names[memo_key]
+        except KeyError:
+            pass
+
         base = self._name_sanitizer.sanitize(base)
         if self._namespace.try_add_constant(base, obj):
+            self._mangled_names[memo_key] = base
             return base
 
-        for i in itertools.count(1):
+        # probing resumes from the last deconflicted suffix of this base,
+        # so k collisions cost O(k) probes in total instead of O(k^2)
+        i = self._next_suffix.get(base, 1)
+        while True:
             name = f"{base}_{i}"
+            i += 1
             if self._namespace.try_add_constant(name, obj):
+                self._next_suffix[base] = i
+                self._mangled_names[memo_key] = name
                 return name
-        raise RuntimeError
+
+
+def _handle_positional_arg(
+    arg: PositionalArg[BroachingPlan],
+    sub_ast: ast.expr,
+    args: List[ast.expr],
+    keywords: List[ast.keyword],
+) -> None:
+    args.append(sub_ast)
+
+
+def _handle_keyword_arg(
+    arg: KeywordArg[BroachingPlan],
+    sub_ast: ast.expr,
+    args: List[ast.expr],
+    keywords: List[ast.keyword],
+) -> None:
+    keywords.append(ast.keyword(arg=arg.key, value=sub_ast))
+
+
+def _handle_unpack_mapping(
+    arg: UnpackMapping[BroachingPlan],
+    sub_ast: ast.expr,
+    args: List[ast.expr],
+    keywords: List[ast.keyword],
+) -> None:
+    keywords.append(ast.keyword(value=sub_ast))
+
+
+def _handle_unpack_iterable(
+    arg: UnpackIterable[BroachingPlan],
+    sub_ast: ast.expr,
+    args: List[ast.expr],
+    keywords: List[ast.keyword],
+) -> None:
+    args.append(ast.Starred(value=sub_ast, ctx=_LOAD))
+
+
+_ARG_HANDLERS: Mapping[type, Callable[..., None]] = {
+    PositionalArg: _handle_positional_arg,
+    KeywordArg: _handle_keyword_arg,
+    UnpackMapping: _handle_unpack_mapping,
+    UnpackIterable: _handle_unpack_iterable,
+}
+
+
+def _element_children(element: BroachingPlan) -> Tuple[BroachingPlan, ...]:
+    if type(element) is FunctionElement:
+        return tuple(arg.element for arg in element.args)
+    if type(element) is AccessorElement:
+        return (element.target,)
+    return ()
 
 
 class BroachingCodeGenerator(ABC):
@@ -65,7 +281,7 @@ class BroachingCodeGenerator(ABC):
         signature: Signature,
         closure_name: str,
         stub_function: Optional[Callable],
-    ) -> Tuple[str, Mapping[str, object]]:
+    ) -> Tuple[str, CodeType, Mapping[str, object]]:
         ...
 
 
@@ -73,6 +289,12 @@ class BuiltinBroachingCodeGenerator(BroachingCodeGenerator):
     def __init__(self, plan: BroachingPlan, name_sanitizer: NameSanitizer):
         self._plan = plan
         self._name_sanitizer = name_sanitizer
+        self._element_dispatch: Mapping[type, Callable[[GenState, Any, Sequence[ast.expr]], ast.expr]] = {
+            ParameterElement: self._gen_parameter_element,
+            ConstantElement: self._gen_constant_element,
+            FunctionElement: self._gen_function_element,
+            AccessorElement: self._gen_accessor_element,
+        }
 
     def _create_state(self, namespace: CascadeNamespace) -> GenState:
         return GenState(
@@ -85,114 +307,191 @@ class BuiltinBroachingCodeGenerator(BroachingCodeGenerator):
         signature: Signature,
         closure_name: str,
         stub_function: Optional[Callable],
-    ) -> Tuple[str, Mapping[str, object]]:
-        builder = CodeBuilder()
+    ) -> Tuple[str, CodeType, Mapping[str, object]]:
+        fingerprint = _plan_fingerprint(self._plan)
+        # the signature is keyed by its object, not by its rendered text:
+        # distinct signatures can format identically (e.g. redefinitions of an annotation class)
+        cache_key = (
+            fingerprint,
+            signature,
+            closure_name,
+            id(stub_function),
+        )
+        try:
+            with _code_cache_lock:
+                cached = _code_cache.get(cache_key)
+                if cached is not None:
+                    _code_cache.move_to_end(cache_key)
+                    return cached[0], cached[1], cached[2]
+        except TypeError:
+            # a signature with unhashable annotations just bypasses the cache
+            return self._produce_code(signature, closure_name, stub_function, fingerprint)
+
+        source, code, namespace = self._produce_code(signature, closure_name, stub_function, fingerprint)
+        with _code_cache_lock:
+            # the plan is stored to pin ids of objects involved into the fingerprint
+            _code_cache[cache_key] = (source, code, namespace, self._plan)
+            if len(_code_cache) > _CODE_CACHE_MAX_SIZE:
+                _code_cache.popitem(last=False)
+        return source, code, namespace
+
+    def _produce_code(
+        self,
+        signature: Signature,
+        closure_name: str,
+        stub_function: Optional[Callable],
+        fingerprint: str,
+    ) -> Tuple[str, CodeType, Mapping[str, object]]:
         namespace = BuiltinCascadeNamespace(occupied=signature.parameters.keys())
         state = self._create_state(namespace=namespace)
 
         namespace.add_constant("_closure_signature", signature)
         namespace.add_constant("_stub_function", stub_function)
         namespace.add_constant("_update_wrapper", update_wrapper)
-        no_types_signature = signature.replace(
-            parameters=[param.replace(annotation=Signature.empty) for param in signature.parameters.values()],
-            return_annotation=Signature.empty,
+
+        module = ast.parse(self._get_module_skeleton(signature, closure_name, stub_function))
+        closure_def = cast(ast.FunctionDef, module.body[0])
+        return_stmt = cast(ast.Return, closure_def.body[0])
+        return_stmt.value = self._gen_plan_element_dispatch(state, self._plan)
+
+        # the module is compiled right from the AST,
+        # so executing the code does not require re-parsing of the unparsed source
+        _fill_missing_locations(return_stmt)
+        code = compile(module, f"<adaptix broaching {fingerprint}>", "exec")
+        return compat_ast_unparse(module), code, namespace.constants
+
+    def _get_module_skeleton(
+        self,
+        signature: Signature,
+        closure_name: str,
+        stub_function: Optional[Callable],
+    ) -> str:
+        # the skeleton is parsed once and the return placeholder is replaced
+        # with the generated expression, so the whole module is unparsed in one pass
+        no_types_signature = _strip_annotations(signature)
+        update_wrapper_stmt = f"_update_wrapper({closure_name}, _stub_function)\n" if stub_function is not None else ""
+        return (
+            f"def {closure_name}{no_types_signature}:\n"
+            f"    return None\n"
+            f"{update_wrapper_stmt}"
+            f"{closure_name}.__signature__ = _closure_signature\n"
+            f"{closure_name}.__name__ = {closure_name!r}\n"
         )
-        with builder(f"def {closure_name}{no_types_signature}:"):
-            body = self._gen_plan_element_dispatch(state, self._plan)
-            builder += "return " + compat_ast_unparse(body)
 
-        if stub_function is not None:
-            builder += f"_update_wrapper({closure_name}, _stub_function)"
+    def _gen_plan_element_dispatch(self, state: GenState, element: BroachingPlan) -> ast.expr:
+        # iterative post-order traversal: children are expanded first,
+        # then each element is built from already generated sub-nodes.
+        # One Python frame serves the whole plan, so the walker itself never
+        # hits the recursion limit; unparsing and compiling the result are
+        # still recursive and bound the practical nesting depth
+        element_dispatch = self._element_dispatch
+        results: List[ast.expr] = []
+        stack: List[Tuple[BroachingPlan, Optional[Tuple[BroachingPlan, ...]]]] = [(element, None)]
+        while stack:
+            current, children = stack.pop()
+            if children is None:
+                children = _element_children(current)
+                if children:
+                    stack.append((current, children))
+                    stack.extend((child, None) for child in reversed(children))
+                    continue
+                sub_asts: Sequence[ast.expr] = ()
+            else:
+                sub_asts = results[-len(children):]
+                del results[-len(children):]
 
-        builder += f"{closure_name}.__signature__ = _closure_signature"
-        builder += f"{closure_name}.__name__ = {closure_name!r}"
-        return builder.string(), namespace.constants
+            try:
+                gen_element = element_dispatch[type(current)]
+            except KeyError:
+                raise TypeError from None
+            results.append(gen_element(state, current, sub_asts))
+        return results[0]
 
-    def _gen_plan_element_dispatch(self, state: GenState, element: BroachingPlan) -> AST:
-        if isinstance(element, ParameterElement):
-            return self._gen_parameter_element(state, element)
-        if isinstance(element, ConstantElement):
-            return self._gen_constant_element(state, element)
-        if isinstance(element, FunctionElement):
-            return self._gen_function_element(state, element)
-        if isinstance(element, AccessorElement):
-            return self._gen_accessor_element(state, element)
-        raise TypeError
+    def _gen_parameter_element(
+        self,
+        state: GenState,
+        element: ParameterElement,
+        sub_asts: Sequence[ast.expr],
+    ) -> ast.expr:
+        return ast.Name(id=element.name, ctx=_LOAD)
 
-    def _gen_parameter_element(self, state: GenState, element: ParameterElement) -> AST:
-        return ast.Name(id=element.name, ctx=ast.Load())
+    def _gen_constant_element(
+        self,
+        state: GenState,
+        element: ConstantElement,
+        sub_asts: Sequence[ast.expr],
+    ) -> ast.expr:
+        value = element.value
+        if type(value) in _LITERAL_TYPES and (
+            not isinstance(value, (float, complex)) or cmath.isfinite(value)
+        ):
+            return ast.Constant(value=value)
 
-    def _gen_constant_element(self, state: GenState, element: ConstantElement) -> AST:
-        expr = get_literal_expr(element.value)
+        expr = state.literal_expr(value)
         if expr is not None:
-            return ast.parse(expr)
+            return _parse_expr(expr)
 
         name = state.register_next_id("constant", element.value)
-        return ast.Name(id=name, ctx=ast.Load())
+        return ast.Name(id=name, ctx=_LOAD)
 
-    def _gen_function_element(self, state: GenState, element: FunctionElement[BroachingPlan]) -> AST:
-        if (
-            element.func == as_is_stub
-            and len(element.args) == 1
-            and isinstance(element.args[0], PositionalArg)
-        ):
-            return self._gen_plan_element_dispatch(state, element.args[0].element)
+    def _gen_function_element(
+        self,
+        state: GenState,
+        element: FunctionElement[BroachingPlan],
+        sub_asts: Sequence[ast.expr],
+    ) -> ast.expr:
+        if element._passthrough:
+            return sub_asts[0]
 
         if not element.args:
             literal = get_literal_from_factory(element.func)
             if literal is not None:
-                return ast.parse(literal)
+                return _parse_expr(literal)
 
         if getattr(element.func, "__name__", None) is not None:
             name = state.register_mangled(element.func.__name__, element.func)
         else:
             name = state.register_next_id("func", element.func)
 
-        args = []
-        keywords = []
-        for arg in element.args:
-            if isinstance(arg, PositionalArg):
-                sub_ast = self._gen_plan_element_dispatch(state, arg.element)
-                args.append(sub_ast)
-            elif isinstance(arg, KeywordArg):
-                sub_ast = self._gen_plan_element_dispatch(state, arg.element)
-                keywords.append(ast.keyword(arg=arg.key, value=sub_ast))
-            elif isinstance(arg, UnpackMapping):
-                sub_ast = self._gen_plan_element_dispatch(state, arg.element)
-                keywords.append(ast.keyword(value=sub_ast))
-            elif isinstance(arg, UnpackIterable):
-                sub_ast = self._gen_plan_element_dispatch(state, arg.element)
-                args.append(ast.Starred(value=sub_ast, ctx=ast.Load()))
-            else:
-                raise TypeError
+        args: List[ast.expr] = []
+        keywords: List[ast.keyword] = []
+        arg_handlers = _ARG_HANDLERS
+        for arg, sub_ast in zip(element.args, sub_asts):
+            try:
+                arg_handler = arg_handlers[type(arg)]
+            except KeyError:
+                raise TypeError from None
+            arg_handler(arg, sub_ast, args, keywords)
 
         return ast.Call(
-            func=ast.Name(name, ast.Load()),
+            func=ast.Name(name, _LOAD),
             args=args,
             keywords=keywords,
         )
 
-    def _gen_accessor_element(self, state: GenState, element: AccessorElement[BroachingPlan]) -> AST:
-        target_expr = self._gen_plan_element_dispatch(state, element.target)
-        if isinstance(element.accessor, DescriptorAccessor):
-            if element.accessor.attr_name.isidentifier():
-                return ast_substitute(
-                    f"__target_expr__.{element.accessor.attr_name}",
-                    target_expr=target_expr,
-                )
-            return ast_substitute(
-                f"getattr(__target_expr__, {element.accessor.attr_name!r})",
-                target_expr=target_expr,
+    def _gen_accessor_element(
+        self,
+        state: GenState,
+        element: AccessorElement[BroachingPlan],
+        sub_asts: Sequence[ast.expr],
+    ) -> ast.expr:
+        target_expr = sub_asts[0]
+        accessor = element.accessor
+        if isinstance(accessor, DescriptorAccessor):
+            if accessor.is_attr_name_identifier:
+                return ast.Attribute(value=target_expr, attr=accessor.attr_name, ctx=_LOAD)
+            return ast.Call(
+                func=ast.Name(id="getattr", ctx=_LOAD),
+                args=[target_expr, ast.Constant(value=accessor.attr_name)],
+                keywords=[],
             )
 
-        if isinstance(element.accessor, ItemAccessor):
-            return ast_substitute(
-                f"__target_expr__[{element.accessor.key!r}]",
-                target_expr=target_expr,
-            )
+        if isinstance(accessor, ItemAccessor):
+            return _build_subscript(target_expr, accessor.key)
 
-        name = state.register_next_id("accessor", element.accessor.getter)
-        return ast_substitute(
-            f"{name}(__target_expr__)",
-            target_expr=target_expr,
+        name = state.register_next_id("accessor", accessor.getter)
+        return ast.Call(
+            func=ast.Name(id=name, ctx=_LOAD),
+            args=[target_expr],
+            keywords=[],
         )
@@ -1,8 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Callable, Generic, TypeVar, Union
 
 from adaptix._internal.common import VarTuple
 from adaptix._internal.model_tools.definitions import Accessor
+from adaptix._internal.special_cases_optimization import as_is_stub
 
 
 class BasePlanElement:
@@ -55,6 +56,16 @@ FuncCallArg = Union[
 class FunctionElement(BasePlanElement, Generic[PlanT]):
     func: Callable[..., Any]
     args: VarTuple[FuncCallArg[PlanT]]
+    # derived at construction, so the code generator can skip
+    # the check on every visit of the most common node shape
+    _passthrough: bool = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self):
+        object.__setattr__(
+            self,
+            "_passthrough",
+            self.func is as_is_stub and len(self.args) == 1 and isinstance(self.args[0], PositionalArg),
+        )
 
 
 @dataclass(frozen=True)
@@ -1,6 +1,8 @@
+import linecache
 from abc import ABC, abstractmethod
 from functools import reduce
 from inspect import Parameter, Signature
+from types import CodeType
 from typing import Any, Iterable, List, Mapping, Optional, Sequence, Tuple, cast, final
 
 from ..code_tools.compiler import BasicClosureCompiler, ClosureCompiler
@@ -28,7 +30,7 @@ from ..conversion.request_cls import (
     UnlinkedOptionalPolicyRequest,
 )
 from ..model_tools.definitions import BaseField, DefaultValue, InputField, InputShape, NoDefault, OutputShape, ParamKind
-from ..morphing.model.basic_gen import compile_closure_with_globals_capturing, fetch_code_gen_hook
+from ..morphing.model.basic_gen import compile_closure_with_globals_capturing, fetch_code_gen_hook, stub_code_gen_hook
 from ..provider.essential import CannotProvide, Mediator, mandatory_apply_by_iterable
 from ..provider.fields import base_field_to_loc_map, input_field_to_loc_map
 from ..provider.request_cls import LocMap, LocStack, TypeHintLoc
@@ -37,6 +39,17 @@ from ..provider.static_provider import StaticProvider, static_provision_action
 from ..utils import add_note
 
 
+def _retarget_code(code_obj: CodeType, file_name: str) -> CodeType:
+    # the cached code object carries a fingerprint-derived filename,
+    # so it is re-targeted (including code objects of nested closures)
+    # to keep per-converter traceback filenames
+    consts = tuple(
+        _retarget_code(const, file_name) if isinstance(const, CodeType) else const
+        for const in code_obj.co_consts
+    )
+    return code_obj.replace(co_consts=consts, co_filename=file_name)
+
+
 class ConverterProvider(StaticProvider, ABC):
     @final
     @static_provision_action
@@ -91,21 +104,55 @@ class BuiltinConverterProvider(ConverterProvider):
     ):
         code_gen = self._create_broaching_code_gen(broaching_plan)
         closure_name = self._get_closure_name(request)
-        dumper_code, dumper_namespace = code_gen.produce_code(
+        dumper_code, dumper_code_obj, dumper_namespace = code_gen.produce_code(
             signature=request.signature,
             closure_name=closure_name,
             stub_function=request.stub_function,
         )
         code_gen_loc_stack = LocStack(LocMap(TypeHintLoc(self._get_type_from_annotation(signature.return_annotation))))
+        code_gen_hook = fetch_code_gen_hook(mediator, code_gen_loc_stack)
+        compiler = self._get_compiler()
+        if code_gen_hook is stub_code_gen_hook and type(compiler) is BasicClosureCompiler:
+            # the compiler's counter deduplicates filenames of same-named converters,
+            # so one linecache entry can not shadow another
+            unique_id = compiler._get_unique_id(self._get_file_name(request))
+            return self._exec_closure_code(
+                code_obj=dumper_code_obj,
+                source=dumper_code,
+                namespace=dumper_namespace,
+                closure_name=closure_name,
+                file_name=f"<adaptix generated {unique_id}>",
+            )
         return compile_closure_with_globals_capturing(
-            compiler=self._get_compiler(),
-            code_gen_hook=fetch_code_gen_hook(mediator, code_gen_loc_stack),
+            compiler=compiler,
+            code_gen_hook=code_gen_hook,
             namespace=dumper_namespace,
             closure_code=dumper_code,
             closure_name=closure_name,
             file_name=self._get_file_name(request),
         )
 
+    def _exec_closure_code(
+        self,
+        code_obj: CodeType,
+        source: str,
+        namespace: Mapping[str, object],
+        closure_name: str,
+        file_name: str,
+    ) -> Converter:
+        # the code object is already compiled from the generated AST,
+        # so the source does not have to be parsed again
+        code_obj = _retarget_code(code_obj, file_name)
+        global_namespace = dict(namespace)
+        exec(code_obj, global_namespace)  # noqa: S102
+        linecache.cache[file_name] = (
+            len(source),
+            None,
+            source.splitlines(keepends=True),
+            file_name,
+        )
+        return cast(Converter, global_namespace[closure_name])
+
     def _get_closure_name(self, request: ConverterRequest) -> str:
         if request.function_name is not None:
             return request.function_name
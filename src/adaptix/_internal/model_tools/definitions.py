@@ -63,6 +63,7 @@ class DescriptorAccessor(Accessor, ABC):
     def __init__(self, attr_name: str, access_error: Optional[Catchable]):
         self._attr_name = attr_name
         self._access_error = access_error
+        self._is_attr_name_identifier = attr_name.isidentifier()
 
     # noinspection PyMethodOverriding
     def getter(self, obj):
@@ -80,6 +81,10 @@ class DescriptorAccessor(Accessor, ABC):
     def attr_name(self) -> str:
         return self._attr_name
 
+    @property
+    def is_attr_name_identifier(self) -> bool:
+        return self._is_attr_name_identifier
+
     def __eq__(self, other):
         if isinstance(other, DescriptorAccessor):
             return self._attr_name == other._attr_name and self._access_error == other._access_error
@@ -189,7 +189,7 @@ class BuiltinModelDumperGen(ModelDumperGen):
     def _gen_access_expr(self, namespace: CascadeNamespace, field: OutputField) -> str:
         accessor = field.accessor
         if isinstance(accessor, DescriptorAccessor):
-            if accessor.attr_name.isidentifier():
+            if accessor.is_attr_name_identifier:
                 return f"data.{accessor.attr_name}"
             return f"getattr(data, {accessor.attr_name!r})"
         if isinstance(accessor, ItemAccessor):
@@ -14,11 +14,9 @@ from ..model_tools.definitions import (
     Shape,
     ShapeIntrospector,
 )
-from ..model_tools.introspection.attrs import get_attrs_shape
 from ..model_tools.introspection.class_init import get_class_init_shape
 from ..model_tools.introspection.dataclass import get_dataclass_shape
 from ..model_tools.introspection.named_tuple import get_named_tuple_shape
-from ..model_tools.introspection.sqlalchemy import get_sqlalchemy_shape
 from ..model_tools.introspection.typed_dict import get_typed_dict_shape
 from ..provider.essential import CannotProvide, Mediator
 from ..provider.loc_stack_filtering import create_loc_stack_checker
@@ -73,12 +71,27 @@ class ShapeProvider(StaticProvider):
         return shape.output
 
 
+def _get_attrs_shape(tp) -> Shape:
+    # the introspection module imports the attrs package at the top level,
+    # so it is loaded lazily to keep `import adaptix` free of this cost
+    from ..model_tools.introspection.attrs import get_attrs_shape
+
+    return get_attrs_shape(tp)
+
+
+def _get_sqlalchemy_shape(tp) -> Shape:
+    # sqlalchemy is very expensive to import, see the comment above
+    from ..model_tools.introspection.sqlalchemy import get_sqlalchemy_shape
+
+    return get_sqlalchemy_shape(tp)
+
+
 BUILTIN_SHAPE_PROVIDER = ConcatProvider(
     ShapeProvider(get_named_tuple_shape),
     ShapeProvider(get_typed_dict_shape),
     ShapeProvider(get_dataclass_shape),
-    ShapeProvider(get_attrs_shape),
-    ShapeProvider(get_sqlalchemy_shape),
+    ShapeProvider(_get_attrs_shape),
+    ShapeProvider(_get_sqlalchemy_shape),
     # class init introspection must be the last
     ShapeProvider(get_class_init_shape),
 )
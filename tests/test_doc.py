@@ -15,22 +15,16 @@ def pytest_generate_tests(metafunc):
     if "import_path" not in metafunc.fixturenames:
         return
 
-    paths_to_test = [
-        sub_path
-        for sub_path in DOCS_EXAMPLES_ROOT.rglob(GLOB)
-        if sub_path.name not in EXCLUDE and not sub_path.is_dir()
-    ]
-    metafunc.parametrize(
-        ["import_path", "case_id"],
-        [
-            pytest.param(
-                ".".join((path_to_test.parent / path_to_test.stem).relative_to(REPO_ROOT).parts),
-                str((path_to_test.parent / path_to_test.stem).relative_to(DOCS_EXAMPLES_ROOT).as_posix()),
-                id=str((path_to_test.parent / path_to_test.stem).relative_to(DOCS_EXAMPLES_ROOT).as_posix()),
-            )
-            for path_to_test in paths_to_test
-        ],
-    )
+    params = []
+    for path_to_test in DOCS_EXAMPLES_ROOT.rglob(GLOB):
+        if path_to_test.name in EXCLUDE or path_to_test.is_dir():
+            continue
+        stem_path = path_to_test.parent / path_to_test.stem
+        import_path = ".".join(stem_path.relative_to(REPO_ROOT).parts)
+        case_id = stem_path.relative_to(DOCS_EXAMPLES_ROOT).as_posix()
+        params.append(pytest.param(import_path, case_id, id=case_id))
+
+    metafunc.parametrize(["import_path", "case_id"], params)
 
 
 def test_example(import_path: str, case_id: str):
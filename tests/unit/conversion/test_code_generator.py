@@ -0,0 +1,139 @@
+from inspect import Parameter, Signature, signature
+
+from adaptix._internal.code_tools.name_sanitizer import BuiltinNameSanitizer
+from adaptix._internal.conversion.broaching.code_generator import (
+    _CODE_CACHE_MAX_SIZE,
+    BuiltinBroachingCodeGenerator,
+    _code_cache,
+    _plan_fingerprint,
+)
+from adaptix._internal.conversion.broaching.definitions import (
+    AccessorElement,
+    ConstantElement,
+    FunctionElement,
+    ParameterElement,
+    PositionalArg,
+)
+from adaptix._internal.model_tools.definitions import create_attr_accessor
+
+
+def stub(data):
+    return data
+
+
+def make_plan():
+    return FunctionElement(
+        func=stub,
+        args=(
+            PositionalArg(
+                AccessorElement(
+                    target=ParameterElement("data"),
+                    accessor=create_attr_accessor("some_attr", is_required=True),
+                ),
+            ),
+        ),
+    )
+
+
+def produce_code(plan, sig=None):
+    return BuiltinBroachingCodeGenerator(plan=plan, name_sanitizer=BuiltinNameSanitizer()).produce_code(
+        signature=signature(stub) if sig is None else sig,
+        closure_name="converter",
+        stub_function=None,
+    )
+
+
+def test_fingerprint_deep_plan():
+    plan = ParameterElement("data")
+    for _ in range(5000):
+        plan = AccessorElement(
+            target=plan,
+            accessor=create_attr_accessor("some_attr", is_required=True),
+        )
+    assert _plan_fingerprint(plan) == _plan_fingerprint(plan)
+
+
+def test_produce_code_deep_plan():
+    # the depth is limited by the recursive ast.unparse and compile,
+    # not by the code generator itself
+    plan = ParameterElement("data")
+    for _ in range(200):
+        plan = AccessorElement(
+            target=plan,
+            accessor=create_attr_accessor("some_attr", is_required=True),
+        )
+
+    source, _, _ = produce_code(plan)
+
+    assert source.count("some_attr") == 200
+
+
+def test_fingerprint_no_aliasing_of_tricky_names():
+    def attr(target, name):
+        return AccessorElement(target=target, accessor=create_attr_accessor(name, is_required=True))
+
+    target = ParameterElement("data")
+    tricky = attr(target, "a;attr_accessor:b")
+    chain = attr(attr(target, "b"), "a")
+
+    assert _plan_fingerprint(tricky) != _plan_fingerprint(chain)
+
+
+def test_fingerprint_equality():
+    assert _plan_fingerprint(make_plan()) == _plan_fingerprint(make_plan())
+    assert _plan_fingerprint(make_plan()) != _plan_fingerprint(ParameterElement("data"))
+    assert _plan_fingerprint(ParameterElement("a")) != _plan_fingerprint(ParameterElement("b"))
+    assert _plan_fingerprint(ConstantElement(value=stub)) != _plan_fingerprint(ConstantElement(value=Signature))
+
+
+def test_produce_code_caching():
+    source1, code_obj1, namespace1 = produce_code(make_plan())
+    source2, code_obj2, namespace2 = produce_code(make_plan())
+
+    assert source1 is source2
+    assert code_obj1 is code_obj2
+    assert namespace1 is namespace2
+
+
+def test_code_cache_is_bounded():
+    for _ in range(_CODE_CACHE_MAX_SIZE + 10):
+        produce_code(ConstantElement(value=object()))
+
+    assert len(_code_cache) <= _CODE_CACHE_MAX_SIZE
+
+
+def test_produce_code_cache_miss():
+    source1, _, _ = produce_code(make_plan())
+    source2, _, _ = produce_code(ParameterElement("data"))
+
+    assert source1 != source2
+
+
+def test_produce_code_distinct_signatures_rendering_identically():
+    def make_sig():
+        return Signature(
+            parameters=[Parameter("data", Parameter.POSITIONAL_OR_KEYWORD)],
+            return_annotation=type("Foo", (), {}),
+        )
+
+    sig1 = make_sig()
+    sig2 = make_sig()
+    assert str(sig1) == str(sig2)
+
+    _, _, namespace1 = produce_code(make_plan(), sig=sig1)
+    _, _, namespace2 = produce_code(make_plan(), sig=sig2)
+
+    assert namespace1["_closure_signature"] is sig1
+    assert namespace2["_closure_signature"] is sig2
+
+
+def test_produce_code_unhashable_signature():
+    sig = Signature(
+        parameters=[Parameter("data", Parameter.POSITIONAL_OR_KEYWORD, annotation=["unhashable"])],
+    )
+
+    _, _, namespace1 = produce_code(make_plan(), sig=sig)
+    _, _, namespace2 = produce_code(make_plan(), sig=sig)
+
+    assert namespace1["_closure_signature"] is sig
+    assert namespace1 is not namespace2
@@ -0,0 +1,36 @@
+import linecache
+from dataclasses import dataclass
+
+from adaptix.conversion import get_converter
+
+
+@dataclass
+class FirstSource:
+    x: int
+
+
+@dataclass
+class FirstDest:
+    x: int
+
+
+@dataclass
+class SecondSource:
+    y: int
+
+
+@dataclass
+class SecondDest:
+    y: int
+
+
+def test_same_named_converters_get_distinct_files():
+    converter1 = get_converter(FirstSource, FirstDest, name="conv")
+    converter2 = get_converter(SecondSource, SecondDest, name="conv")
+
+    file1 = converter1.__code__.co_filename
+    file2 = converter2.__code__.co_filename
+
+    assert file1 != file2
+    assert "src.x" in "".join(linecache.getlines(file1))
+    assert "src.y" in "".join(linecache.getlines(file2))